@@ -0,0 +1,95 @@
+"""
+bucket_kernels.py
+-----------------
+Point-cloud generators and analytic reference volumes shared by
+AlphaShape_pointcloud_demo.py and ConvexHull_pointcloud_demo.py.
+
+Optional:
+    pip install numba   # JIT point generation, compiled once and cached on disk
+"""
+
+import numpy as np
+import math
+
+try:
+    from numba import njit, prange
+except ImportError:  # optional: fall back to the vectorized numpy generators
+    njit = None
+
+TAU = math.tau
+
+# ==========================
+# Point cloud generators
+# ==========================
+
+# Generators write into a preallocated (N, 3) wall|bottom|fill buffer from
+# one (N, 2) block of uniform draws, so no per-axis temporaries or vstack copies.
+def _wall(u, radius, height, out):
+    theta = u[:, 0]
+    theta *= TAU
+    np.cos(theta, out=out[:, 0])
+    np.sin(theta, out=out[:, 1])
+    out[:, :2] *= radius
+    np.multiply(u[:, 1], height, out=out[:, 2])
+
+def _disk(u, radius, z, out):
+    r = u[:, 0]
+    np.sqrt(r, out=r)
+    r *= radius
+    theta = u[:, 1]
+    theta *= TAU
+    np.cos(theta, out=out[:, 0])
+    np.sin(theta, out=out[:, 1])
+    out[:, 0] *= r
+    out[:, 1] *= r
+    out[:, 2] = z
+
+def _gen_all_numpy(out, u, radius, height, z_fill, n_wall, n_bottom):
+    n_empty = n_wall + n_bottom
+    _wall(u[:n_wall], radius, height, out[:n_wall])
+    _disk(u[n_wall:n_empty], radius, 0.0, out[n_wall:n_empty])
+    _disk(u[n_empty:], radius, z_fill, out[n_empty:])
+
+if njit is not None:
+    # Same math as _gen_all_numpy, fused into one pass with no temporaries.
+    # The explicit signature compiles (or loads from the on-disk cache) at
+    # import, and both demos share the one cache entry.
+    @njit("void(f8[:, ::1], f8[:, ::1], f8, f8, f8, i8, i8)",
+          parallel=True, fastmath=True, cache=True)
+    def _gen_all(out, u, radius, height, z_fill, n_wall, n_bottom):
+        n_empty = n_wall + n_bottom
+        for i in prange(out.shape[0]):
+            if i < n_wall:
+                theta = u[i, 0] * TAU
+                r = radius
+                z = u[i, 1] * height
+            else:
+                theta = u[i, 1] * TAU
+                r = math.sqrt(u[i, 0]) * radius
+                z = 0.0 if i < n_empty else z_fill
+            # one cos/sin site per point; LLVM emits a single sincos call
+            out[i, 0] = r * math.cos(theta)
+            out[i, 1] = r * math.sin(theta)
+            out[i, 2] = z
+else:
+    _gen_all = _gen_all_numpy
+
+def generate_point_cloud(rng, radius, height, fill_ratio, n_wall, n_bottom, n_fill):
+    n_empty = n_wall + n_bottom
+    out = np.empty((n_empty + n_fill, 3))
+    u = np.empty((out.shape[0], 2))
+    # One child stream per segment, so changing one point count leaves the
+    # other segments' points unchanged
+    segments = (slice(0, n_wall), slice(n_wall, n_empty), slice(n_empty, None))
+    for stream, seg in zip(rng.spawn(len(segments)), segments):
+        stream.random(out=u[seg])
+    _gen_all(out, u, radius, height, fill_ratio * height, n_wall, n_bottom)
+    return out
+
+# ==========================
+# Analytic reference
+# ==========================
+
+def analytic_volumes(radius, height, fill_ratio):
+    capacity = math.pi * radius * radius * height
+    return capacity, capacity * fill_ratio
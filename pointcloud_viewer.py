@@ -1,44 +1,84 @@
 # Suggested filename: pointcloud_viewer_toggle.py
 #
-# Point cloud viewer for bucket_volume_pointcloud_demo.json
-# Lets you pick a JSON file via Tkinter and toggle between
-# empty_bucket, fill_points, and full_bucket.
+# Point cloud viewer for the demo outputs (.json or .npz)
+# Lets you pick a file via Tkinter and toggle between
+# empty_bucket, fill_surface, and full_bucket.
 #
 # Requirements:
-#   pip install plotly
+#   pip install plotly numpy
+#   pip install orjson   (optional, faster JSON parsing)
 
 import json
+import numpy as np
 import tkinter as tk
 from tkinter import filedialog
 import plotly.graph_objects as go
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+voxel_size = 0.002   # meters; keep one point per cell for display, 0 = all points
+
+def as_points(pts):
+    # float32 is plenty for display and halves what goes through WebGL
+    return np.asarray(pts, dtype=np.float32).reshape(-1, 3)
+
+def voxel_downsample(a, voxel):
+    # One point per voxel-sized cell; the cell index packs into one int64
+    # key, so a 1-D np.unique does the dedupe
+    if voxel <= 0 or len(a) == 0:
+        return a
+    cells = np.floor((a - a.min(axis=0)) / voxel).astype(np.int64)
+    keys = np.ravel_multi_index(cells.T, cells.max(axis=0) + 1)
+    _, idx = np.unique(keys, return_index=True)
+    return a[np.sort(idx)]
+
+def cols(a):
+    # Column views of an (N, 3) array; Plotly takes numpy arrays directly
+    return a[:, 0], a[:, 1], a[:, 2]
+
 def main():
     # File picker
     root = tk.Tk()
     root.withdraw()
     file_path = filedialog.askopenfilename(
-        title="Select point cloud JSON",
-        filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        title="Select point cloud file",
+        filetypes=[("Point clouds", "*.json *.npz"), ("JSON files", "*.json"),
+                   ("NumPy archives", "*.npz"), ("All files", "*.*")]
     )
     if not file_path:
         print("No file selected.")
         return
 
-    with open(file_path, "r") as f:
-        data = json.load(f)
+    if file_path.endswith(".npz"):
+        with np.load(file_path) as npz:
+            data = {k: npz[k] for k in npz.files}
+    else:
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        del raw
+
+    # Extract groups if present, popping each list so its boxed floats are
+    # freed as soon as it has been converted
+    empty_points = as_points(data.pop("empty_bucket", []))
+    fill_points  = as_points(data.pop("fill_surface", data.pop("fill_points", [])))
+    full_points  = as_points(data.pop("full_bucket", []))
 
-    # Extract groups if present
-    empty_points = data.get("empty_bucket", [])
-    fill_points  = data.get("fill_points", [])
-    full_points  = data.get("full_bucket", [])
+    # Decimate before WebGL; one point per 2 mm cell looks the same at size 2
+    empty_points = voxel_downsample(empty_points, voxel_size)
+    fill_points  = voxel_downsample(fill_points, voxel_size)
+    full_points  = voxel_downsample(full_points, voxel_size)
 
     fig = go.Figure()
 
     traces = []
     labels = []
 
-    if empty_points:
-        xs, ys, zs = zip(*empty_points)
+    if len(empty_points):
+        xs, ys, zs = cols(empty_points)
         traces.append(go.Scatter3d(
             x=xs, y=ys, z=zs,
             mode="markers",
@@ -48,8 +88,8 @@ def main():
         ))
         labels.append("Empty Bucket")
 
-    if fill_points:
-        xs, ys, zs = zip(*fill_points)
+    if len(fill_points):
+        xs, ys, zs = cols(fill_points)
         traces.append(go.Scatter3d(
             x=xs, y=ys, z=zs,
             mode="markers",
@@ -59,8 +99,8 @@ def main():
         ))
         labels.append("Fill Points")
 
-    if full_points:
-        xs, ys, zs = zip(*full_points)
+    if len(full_points):
+        xs, ys, zs = cols(full_points)
         traces.append(go.Scatter3d(
             x=xs, y=ys, z=zs,
             mode="markers",